@@ -1,109 +1,251 @@
-from flask import Flask, request, jsonify, send_from_directory
-import json
-from pathlib import Path
-from datetime import datetime
-import uuid
-
-app = Flask(__name__)
-from communities_backend import communities_api
-app.register_blueprint(communities_api)
-# -----------------------------
-# Paths
-# -----------------------------
-BASE_DIR = Path(__file__).resolve().parent
-REPORTS_FILE = BASE_DIR / "assets" / "reports.json"
-
-# Ensure directory exists
-REPORTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-# Initialize file if missing
-if not REPORTS_FILE.exists():
-    REPORTS_FILE.write_text("[]", encoding="utf-8")
-
-print("🚀 Server running")
-print("📁 Reports file:", REPORTS_FILE)
-
-# -----------------------------
-# Pages
-# -----------------------------
-@app.route("/")
-def home():
-    return send_from_directory(BASE_DIR, "index.html")
-
-@app.route("/report")
-def report_page():
-    return send_from_directory(BASE_DIR, "report.html")
-
-@app.route("/reported")
-def reported_page():
-    return send_from_directory(BASE_DIR, "reported.html")
-
-# -----------------------------
-# API: Get reports
-# -----------------------------
-@app.route("/api/reports", methods=["GET"])
-def get_reports():
-    try:
-        with open(REPORTS_FILE, "r", encoding="utf-8") as f:
-            return jsonify(json.load(f))
-    except Exception as e:
-        print("❌ Read error:", e)
-        return jsonify([])
-
-# -----------------------------
-# API: Save report
-# -----------------------------
-@app.route("/api/report", methods=["POST"])
-def save_report():
-    data = request.get_json(force=True)
-
-    report = {
-        "id": str(uuid.uuid4()),
-        "place": data.get("place"),
-        "state": data.get("state"),
-        "country": data.get("country", "India"),
-        "coordinates": data.get("coordinates", {}),
-        "problemType": data.get("problemType"),
-        "description": data.get("description"),
-        "incidentDate": data.get("incidentDate"),
-        "severity": data.get("severity", "Low"),
-        "reportedAt": datetime.utcnow().isoformat() + "Z"
-    }
-
-    try:
-        with open(REPORTS_FILE, "r+", encoding="utf-8") as f:
-            reports = json.load(f)
-            reports.append(report)
-            f.seek(0)
-            json.dump(reports, f, indent=2)
-            f.truncate()  # Important: remove leftover content
-        print("✅ Saved:", report["id"])
-        return jsonify({"success": True})
-    except Exception as e:
-        print("❌ Save error:", e)
-        return jsonify({"success": False, "error": str(e)}), 500
-
-# -----------------------------
-# Static files (JS/CSS/Images)
-# -----------------------------
-@app.route("/data/<path:filename>")
-def data_files(filename):
-    return send_from_directory(BASE_DIR / "data", filename)
-
-@app.route("/css/<path:filename>")
-def css_files(filename):
-    return send_from_directory(BASE_DIR / "css", filename)
-
-@app.route("/assets/<path:filename>")
-def assets_files(filename):
-    return send_from_directory(BASE_DIR / "assets", filename)
-
-@app.route("/<path:filename>")
-def root_files(filename):
-    return send_from_directory(BASE_DIR, filename)
-
-# -----------------------------
-# Run
-# -----------------------------
-if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+from flask import Flask, Response, request, send_from_directory, stream_with_context
+import fcntl
+import os
+import threading
+from pathlib import Path
+
+# JSON adapters (orjson → ujson → stdlib) and helpers are defined once
+# in communities_backend; both modules must serialize identically.
+from communities_backend import (
+    communities_api,
+    new_id,
+    now_iso,
+    _dumps,
+    _dumps_compact,
+    _json_response,
+    _loads,
+)
+
+app = Flask(__name__)
+app.register_blueprint(communities_api)
+# -----------------------------
+# Paths
+# -----------------------------
+BASE_DIR = Path(__file__).resolve().parent
+# The log lives under data/ (served revalidate-only), NOT assets/ —
+# /assets/ carries a year-long max-age, so a data file there would get
+# cached stale by clients for a year.
+REPORTS_FILE = BASE_DIR / "data" / "reports.jsonl"
+OLD_REPORTS_FILE = BASE_DIR / "assets" / "reports.jsonl"
+LEGACY_REPORTS_FILE = BASE_DIR / "assets" / "reports.json"
+
+# Ensure directory exists
+REPORTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+# Relocate a log written back when it lived under assets/
+if OLD_REPORTS_FILE.exists() and not REPORTS_FILE.exists():
+    OLD_REPORTS_FILE.replace(REPORTS_FILE)
+
+# One-shot migration from the old JSON-array file to the append-only
+# JSONL log; the legacy file is renamed afterwards so this never re-runs
+if LEGACY_REPORTS_FILE.exists() and not REPORTS_FILE.exists():
+    try:
+        _legacy = _loads(LEGACY_REPORTS_FILE.read_bytes())
+    except Exception:
+        _legacy = []
+    if isinstance(_legacy, list):
+        REPORTS_FILE.write_bytes(b"".join(_dumps_compact(r) + b"\n" for r in _legacy))
+        LEGACY_REPORTS_FILE.replace(LEGACY_REPORTS_FILE.with_suffix(".json.migrated"))
+
+# Initialize file if missing
+if not REPORTS_FILE.exists():
+    REPORTS_FILE.touch()
+
+print("🚀 Server running")
+print("📁 Reports file:", REPORTS_FILE)
+
+# -----------------------------
+# Pages
+# -----------------------------
+@app.route("/")
+def home():
+    return send_from_directory(BASE_DIR, "index.html")
+
+@app.route("/report")
+def report_page():
+    return send_from_directory(BASE_DIR, "report.html")
+
+@app.route("/reported")
+def reported_page():
+    return send_from_directory(BASE_DIR, "reported.html")
+
+# -----------------------------
+# Reports cache
+# -----------------------------
+# Storage is one report per line (JSONL) so a POST appends ~300 bytes
+# instead of rewriting the whole file. The endpoint still answers with a
+# JSON array, so the cache holds both the parsed list and the baked
+# array bytes, keyed by the file's mtime; the JSONL-to-array conversion
+# only happens on a cache miss.
+_reports_cache = {"mtime": None, "data": None, "body": None}
+_reports_lock = threading.Lock()
+
+# Long-lived O_APPEND fd for the log; opening/closing per POST costs a
+# handful of syscalls we don't need to pay. Guarded by _reports_lock.
+_reports_fd = {"fd": None}
+
+def _append_report_bytes(buf):
+    fd = _reports_fd["fd"]
+    if fd is None:
+        fd = _reports_fd["fd"] = os.open(
+            REPORTS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644
+        )
+    # _reports_lock only covers this process; flock keeps gunicorn
+    # workers from interleaving appends
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        pre_st = os.fstat(fd)
+        os.write(fd, buf)
+        try:
+            REPORTS_FILE.stat()
+        except OSError:
+            # file vanished under us (external deletion); reopen and rewrite
+            os.close(fd)
+            fd = _reports_fd["fd"] = os.open(
+                REPORTS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644
+            )
+            os.write(fd, buf)
+        os.fsync(fd)
+        # both stats are taken before LOCK_UN: the caller keys its cache
+        # on them, and neither may include another worker's append
+        return pre_st, os.fstat(fd)
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+def _read_reports():
+    reports = []
+    with open(REPORTS_FILE, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                reports.append(_loads(line))
+    return reports
+
+def _stream_reports(since, severity):
+    # Filtered queries walk the JSONL log one line at a time and emit
+    # matches as they go, so peak memory stays at one report regardless
+    # of how large the log grows.
+    yield b"["
+    first = True
+    with open(REPORTS_FILE, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            r = _loads(line)
+            if since and (r.get("reportedAt") or "") < since:
+                continue
+            if severity and r.get("severity") != severity:
+                continue
+            if not first:
+                yield b","
+            yield _dumps_compact(r)
+            first = False
+    yield b"]"
+
+# -----------------------------
+# API: Get reports
+# -----------------------------
+@app.route("/api/reports", methods=["GET"])
+def get_reports():
+    since = request.args.get("since")
+    severity = request.args.get("severity")
+    if since or severity:
+        return Response(
+            stream_with_context(_stream_reports(since, severity)),
+            mimetype="application/json",
+        )
+    try:
+        with _reports_lock:
+            st = REPORTS_FILE.stat()
+            if st.st_mtime_ns != _reports_cache["mtime"]:
+                reports = _read_reports()
+                _reports_cache["data"] = reports
+                _reports_cache["body"] = _dumps(reports)
+                _reports_cache["mtime"] = st.st_mtime_ns
+            return Response(_reports_cache["body"], mimetype="application/json")
+    except Exception as e:
+        print("❌ Read error:", e)
+        return _json_response([])
+
+# -----------------------------
+# API: Save report
+# -----------------------------
+@app.route("/api/report", methods=["POST"])
+def save_report():
+    data = request.get_json(force=True)
+
+    report = {
+        "id": new_id(),
+        "place": data.get("place"),
+        "state": data.get("state"),
+        "country": data.get("country", "India"),
+        "coordinates": data.get("coordinates", {}),
+        "problemType": data.get("problemType"),
+        "description": data.get("description"),
+        "incidentDate": data.get("incidentDate"),
+        "severity": data.get("severity", "Low"),
+        "reportedAt": now_iso()
+    }
+
+    try:
+        with _reports_lock:
+            pre_st, post_st = _append_report_bytes(_dumps_compact(report) + b"\n")
+            # Keep the cache warm so the next GET skips disk entirely;
+            # freshness is judged by the pre-write stat taken under the
+            # flock, so another worker's append can't be missed
+            if (
+                _reports_cache["data"] is not None
+                and pre_st.st_mtime_ns == _reports_cache["mtime"]
+            ):
+                _reports_cache["data"].append(report)
+            else:
+                _reports_cache["data"] = _read_reports()
+            _reports_cache["body"] = _dumps(_reports_cache["data"])
+            _reports_cache["mtime"] = post_st.st_mtime_ns
+        print("✅ Saved:", report["id"])
+        return _json_response({"success": True})
+    except Exception as e:
+        print("❌ Save error:", e)
+        return _json_response({"success": False, "error": str(e)}, status=500)
+
+# -----------------------------
+# Static files (JS/CSS/Images)
+# -----------------------------
+# conditional=True lets Flask answer If-Modified-Since/ETag revalidations
+# with an empty 304 instead of re-sending the body. Immutable asset
+# directories also get a year-long max-age so browsers stop re-requesting
+# them at all; data files stay revalidate-only since they change.
+STATIC_MAX_AGE = 31536000  # one year
+
+@app.route("/data/<path:filename>")
+def data_files(filename):
+    return send_from_directory(BASE_DIR / "data", filename, conditional=True)
+
+@app.route("/css/<path:filename>")
+def css_files(filename):
+    return send_from_directory(BASE_DIR / "css", filename, max_age=STATIC_MAX_AGE, conditional=True)
+
+@app.route("/assets/<path:filename>")
+def assets_files(filename):
+    return send_from_directory(BASE_DIR / "assets", filename, max_age=STATIC_MAX_AGE, conditional=True)
+
+@app.route("/images/<path:filename>")
+def images_files(filename):
+    return send_from_directory(BASE_DIR / "images", filename, max_age=STATIC_MAX_AGE, conditional=True)
+
+@app.route("/<path:filename>")
+def root_files(filename):
+    return send_from_directory(BASE_DIR, filename, conditional=True)
+
+# -----------------------------
+# Run
+# -----------------------------
+# Werkzeug's dev server is single-process and the reloader stats every
+# module per request; in production run through gunicorn instead, e.g.
+#   gunicorn -k gevent -w $(nproc) --preload app:app
+# With --preload the module-level caches are shared copy-on-write across
+# workers; cross-worker freshness is handled by the mtime cache keys and
+# cross-worker write exclusion by the flock around each append.
+if __name__ == "__main__":
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1")
\ No newline at end of file
@@ -1,150 +1,660 @@
-# communities_backend.py
-from flask import Blueprint, request, jsonify
-from pathlib import Path
-import json, hashlib, uuid
-from datetime import datetime
-
-communities_api = Blueprint("communities_api", __name__)
-
-# ---------------- CONFIG ----------------
-DATA_DIR = Path(__file__).resolve().parent / "data"
-DATA_FILE = DATA_DIR / "communities.json"
-AUTHOR_SECRET = "VOYA_SECURE_AUTHOR_KEY"  # placeholder; consider env var
-
-DATA_DIR.mkdir(exist_ok=True)
-if not DATA_FILE.exists():
-    DATA_FILE.write_text("{}", encoding="utf-8")  # dict keyed by community
-
-# ---------------- HELPERS ----------------
-def generate_hash(message, timestamp, community, prev_hash):
-    raw = f"{message}|{timestamp}|{community}|{prev_hash}"
-    return hashlib.sha256(raw.encode()).hexdigest()
-
-def load_data():
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Normalize: must be dict of lists
-            if isinstance(data, list):
-                # auto-fix: collapse list into dict by community
-                fixed = {}
-                for entry in data:
-                    cid = entry.get("community", "unknown")
-                    fixed.setdefault(cid, []).append(entry)
-                return fixed
-            if not isinstance(data, dict):
-                return {}
-            # ensure lists for every key
-            for k, v in list(data.items()):
-                if not isinstance(v, list):
-                    data[k] = []
-            return data
-    except Exception:
-        return {}
-
-def save_data(data):
-    # atomic write
-    tmp = DATA_FILE.with_suffix(".tmp")
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-    tmp.replace(DATA_FILE)
-
-def now_iso():
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
-
-def validate_message_payload(payload):
-    if not isinstance(payload, dict):
-        return "Invalid JSON", None
-    message = payload.get("message")
-    community = payload.get("community")
-    author = payload.get("author")  # optional
-    if not community or not isinstance(community, str):
-        return "community is required", None
-    if not message or not isinstance(message, str) or not message.strip():
-        return "message is required", None
-    # trim to reasonable length
-    msg = message.strip()
-    if len(msg) > 5000:
-        return "message too long", None
-    return None, {"community": community.strip(), "message": msg, "author": (author or "anonymous").strip()}
-
-# ---------------- ROUTES ----------------
-@communities_api.route("/api/messages", methods=["GET"])
-def get_messages_grouped():
-    """
-    Returns all messages grouped by community:
-    {
-      "voya": [ {...}, ... ],
-      "1": [ {...}, ... ],
-      ...
-    }
-    """
-    data = load_data()
-    return jsonify(data)
-
-@communities_api.route("/api/messages/<community>", methods=["GET"])
-def get_messages_for_community(community):
-    """
-    Returns list of messages for a specific community.
-    """
-    data = load_data()
-    return jsonify(data.get(community, []))
-
-@communities_api.route("/api/messages", methods=["POST"])
-def add_message():
-    """
-    Accepts JSON: { "community": "voya", "message": "Hello", "author": "Sreenidhi" }
-    Returns the created message with id/hash/timestamp.
-    """
-    payload = request.get_json(silent=True)
-    err, parsed = validate_message_payload(payload)
-    if err:
-        return jsonify({"error": err}), 400
-
-    community = parsed["community"]
-    message = parsed["message"]
-    author = parsed["author"]
-
-    data = load_data()
-    history = data.get(community, [])
-
-    prev_hash = history[-1]["hash"] if history else ""
-    timestamp = now_iso()
-    entry_id = str(uuid.uuid4())
-
-    entry = {
-        "id": entry_id,
-        "community": community,
-        "author": author,
-        "message": message,
-        "timestamp": timestamp,
-        "prev_hash": prev_hash,
-        "hash": generate_hash(message, timestamp, community, prev_hash),
-    }
-
-    history.append(entry)
-    data[community] = history
-    save_data(data)
-
-    return jsonify(entry), 201
-
-@communities_api.route("/api/messages/<community>/verify", methods=["GET"])
-def verify_chain(community):
-    """
-    Verifies hash chain integrity for a community.
-    Returns { "ok": true } or details of the first broken link.
-    """
-    data = load_data()
-    history = data.get(community, [])
-    prev = ""
-    for i, e in enumerate(history):
-        expected = generate_hash(e["message"], e["timestamp"], community, prev)
-        if e.get("hash") != expected or e.get("prev_hash") != prev:
-            return jsonify({
-                "ok": False,
-                "index": i,
-                "id": e.get("id"),
-                "reason": "hash mismatch or prev_hash mismatch"
-            }), 200
-        prev = e["hash"]
-    return jsonify({"ok": True, "count": len(history)}), 200
+# communities_backend.py
+from flask import Blueprint, Response, request
+from pathlib import Path
+import fcntl
+import hashlib, os, queue, re, sys, time, threading
+from functools import lru_cache
+
+# orjson is 2-5x stdlib for both encode and decode; degrade gracefully
+# through ujson to stdlib json. Adapters speak bytes end to end.
+try:
+    import orjson
+
+    def _loads(b):
+        return orjson.loads(b)
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_compact(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import ujson
+
+        def _loads(b):
+            return ujson.loads(b)
+
+        def _dumps(obj):
+            return ujson.dumps(obj, indent=2).encode("utf-8")
+
+        def _dumps_compact(obj):
+            return ujson.dumps(obj).encode("utf-8")
+    except ImportError:
+        import json
+
+        def _loads(b):
+            return json.loads(b)
+
+        def _dumps(obj):
+            return json.dumps(obj, indent=2).encode("utf-8")
+
+        def _dumps_compact(obj):
+            return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# pysimdjson tokenizes with SIMD and pulls well ahead of orjson once
+# documents reach the multi-MB range, which is where cold cache misses
+# hurt. The Parser is reused so its tape buffer stays warm; it is only
+# touched under _data_lock, and results are materialized to native
+# dicts/lists before caching because a lazy document dies on the next
+# parse() call.
+try:
+    import simdjson
+
+    _simd_parser = simdjson.Parser()
+
+    def _loads_cold(b):
+        doc = _simd_parser.parse(b)
+        return doc.as_dict() if isinstance(doc, simdjson.Object) else doc.as_list()
+except ImportError:
+    _simd_parser = None
+    _loads_cold = _loads
+
+def _json_response(obj, status=200):
+    return Response(_dumps(obj), status=status, mimetype="application/json")
+
+communities_api = Blueprint("communities_api", __name__)
+
+# ---------------- CONFIG ----------------
+DATA_DIR = Path(__file__).resolve().parent / "data"
+LEGACY_DATA_FILE = DATA_DIR / "communities.json"
+COMMUNITIES_DIR = DATA_DIR / "communities"
+AUTHOR_SECRET = "VOYA_SECURE_AUTHOR_KEY"  # placeholder; consider env var
+
+DATA_DIR.mkdir(exist_ok=True)
+COMMUNITIES_DIR.mkdir(exist_ok=True)
+
+# ---------------- STORAGE ----------------
+# Each community lives in data/communities/<community>.jsonl, one message
+# per line. Appending a message is then O(message size) instead of a full
+# rewrite of every chain. Parsed histories are memoized per file, keyed
+# on (mtime_ns, size) so external edits are still noticed.
+_file_cache = {}
+_data_lock = threading.Lock()
+
+# Verified-prefix frontier per community: (count, last_hash, file_key)
+# meaning the first `count` entries already passed verification and end in
+# last_hash, as of the file state file_key. Since chains are append-only,
+# verify_chain only re-hashes what came after the frontier; any change to
+# the file outside append_entry drops the frontier and forces a full scan.
+_verified = {}
+
+# Chain tip per community: {"hash": ..., "count": n}, maintained wherever
+# the file cache is refreshed, so add_message can pick up prev_hash
+# without indexing into the history list.
+_tip = {}
+
+# Fully-baked response bodies for GET /api/messages/<community>, keyed on
+# the same file key as the parse cache. append_entry re-bakes the body it
+# just changed instead of invalidating, so the next GET is a memory read.
+_response_cache = {}
+
+def _etag_for(key):
+    return f'"{key[0]:x}-{key[1]:x}"'
+
+# Community names are user input, so they never become filenames
+# directly: index.json maps each original name to a sanitized file stem
+# (collisions get a numeric suffix). Logs written before the index
+# existed are adopted under their own stem at startup. Like every other
+# cache here, the in-memory copy revalidates against the file's
+# (mtime_ns, size) so a worker sees mappings other workers allocate;
+# allocation itself is serialized across workers with a flock on a
+# dedicated lock file (the index is replaced by rename, so locking the
+# index file itself would lock a dead inode).
+INDEX_FILE = COMMUNITIES_DIR / "index.json"
+INDEX_LOCK_FILE = COMMUNITIES_DIR / "index.lock"
+_index = {}
+_index_key = None
+
+def _save_index():
+    # temp-file + rename, same as _write_community: a reader never sees a
+    # half-written index and a crashed writer never leaves one behind
+    global _index_key
+    tmp = INDEX_FILE.with_suffix(".tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o644)
+    except FileExistsError:
+        tmp.unlink()
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(_dumps(_index))
+    tmp.replace(INDEX_FILE)
+    st = INDEX_FILE.stat()
+    _index_key = (st.st_mtime_ns, st.st_size)
+
+def _refresh_index():
+    global _index, _index_key
+    try:
+        st = INDEX_FILE.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if key == _index_key:
+        return
+    loaded = {}
+    if key is not None:
+        try:
+            loaded = _loads(INDEX_FILE.read_bytes())
+        except Exception:
+            loaded = {}
+    _index = loaded if isinstance(loaded, dict) else {}
+    _index_key = key
+
+def _load_index():
+    _refresh_index()
+    known = set(_index.values())
+    changed = False
+    for path in COMMUNITIES_DIR.glob("*.jsonl"):
+        # adopt only stems that no mapping points to AND that aren't
+        # already an index key — "race" → "race-2" must not be clobbered
+        # back to "race" → "race" just because race.jsonl exists
+        if path.stem not in known and path.stem not in _index:
+            _index[path.stem] = path.stem
+            changed = True
+    if changed:
+        _save_index()
+
+_load_index()
+
+def _safe_stem(community):
+    return re.sub(r"[^a-z0-9_-]", "_", community.lower()) or "community"
+
+def _alloc_stem(community):
+    # rare path (first message of a new community): take the cross-worker
+    # lock, re-read the index in case another worker allocated first,
+    # then persist the new mapping before releasing
+    lock_fd = os.open(INDEX_LOCK_FILE, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        global _index_key
+        _index_key = None  # force a re-read under the lock
+        _refresh_index()
+        stem = _index.get(community)
+        if stem is None:
+            base = _safe_stem(community)
+            taken = set(_index.values())
+            stem, n = base, 2
+            while stem in taken or (COMMUNITIES_DIR / f"{stem}.jsonl").exists():
+                stem = f"{base}-{n}"
+                n += 1
+            _index[community] = stem
+            _save_index()
+        return stem
+    finally:
+        os.close(lock_fd)  # releases the flock
+
+def _community_path(community, create=False):
+    _refresh_index()
+    stem = _index.get(community)
+    if stem is None:
+        if not create:
+            return None
+        stem = _alloc_stem(community)
+    return COMMUNITIES_DIR / f"{stem}.jsonl"
+
+def _parse_jsonl(path):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return []
+    history = []
+    lines = raw.split(b"\n")
+    last = len(lines) - 1
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            history.append(_loads_cold(line))
+        except Exception:
+            if i == last:
+                # torn final append (crash between write and fsync): the
+                # entry was never acknowledged, so drop it silently
+                continue
+            # mid-file corruption: skip the line rather than 500 every
+            # request for this community; verify_chain will report the
+            # break at this position
+            print(f"⚠️ Skipping corrupt line {i + 1} in {path.name}")
+    return history
+
+def _load_community_locked(community):
+    path = _community_path(community)
+    try:
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except (OSError, AttributeError):
+        _file_cache.pop(community, None)
+        _tip.pop(community, None)
+        return []
+    cached = _file_cache.get(community)
+    if cached and cached["key"] == key:
+        return cached["data"]
+    history = _parse_jsonl(path)
+    _file_cache[community] = {"key": key, "data": history}
+    _tip[community] = {
+        "hash": history[-1].get("hash", "") if history else "",
+        "count": len(history),
+    }
+    return history
+
+def load_community(community):
+    """Return the (cached) message list for one community."""
+    with _data_lock:
+        return _load_community_locked(community)
+
+def get_tip(community):
+    """Return the chain tip {"hash": ..., "count": n} for a community."""
+    with _data_lock:
+        _load_community_locked(community)
+        return _tip.get(community, {"hash": "", "count": 0})
+
+def load_data():
+    """Return all messages grouped by community, from the per-file caches."""
+    with _data_lock:
+        return {
+            community: _load_community_locked(community)
+            for community in list(_index)
+        }
+
+# Long-lived O_APPEND fds, one per community, so each append is a single
+# os.write + fsync instead of a full open/close cycle. O_APPEND writes of
+# one line are atomic on POSIX. Guarded by _data_lock like the caches.
+_fd_cache = {}
+
+def _open_append_fd(path):
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+
+def _drop_fd(community):
+    fd = _fd_cache.pop(community, None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+def append_entry(community, entry, sync=True):
+    """Append one message to the community's log and keep its cache warm."""
+    with _data_lock:
+        path = _community_path(community, create=True)
+        fd = _fd_cache.get(community)
+        if fd is None:
+            fd = _fd_cache[community] = _open_append_fd(path)
+        # _data_lock only covers this process; flock keeps gunicorn
+        # workers from interleaving appends on the same chain
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            # another worker may have appended since prev_hash was read;
+            # re-check the tip under the file lock and re-link if needed
+            history = _load_community_locked(community)
+            cached = _file_cache.get(community)
+            pre_key = cached["key"] if cached else None
+            tip_hash = history[-1].get("hash", "") if history else ""
+            if entry["prev_hash"] != tip_hash:
+                entry["prev_hash"] = tip_hash
+                entry["hash"] = generate_hash(
+                    entry["message"], entry["timestamp"], community, tip_hash
+                )
+            buf = _dumps_compact(entry) + b"\n"
+            # a torn previous append leaves the file without a trailing
+            # newline; start a fresh line so this entry can't merge into
+            # the fragment (the fragment itself is skipped on parse)
+            if pre_key and pre_key[1] > 0:
+                with open(path, "rb") as rf:
+                    rf.seek(-1, os.SEEK_END)
+                    if rf.read(1) != b"\n":
+                        buf = b"\n" + buf
+            os.write(fd, buf)
+            try:
+                path.stat()
+            except OSError:
+                # file vanished under us (external deletion); reopen and rewrite
+                _drop_fd(community)
+                fd = _fd_cache[community] = _open_append_fd(path)
+                os.write(fd, buf)
+            if sync:
+                os.fsync(fd)
+            # the cache key must describe the file as of *our* append;
+            # stat'ing after the flock is released could fold another
+            # worker's bytes into a key whose cached list lacks its entry
+            st = os.fstat(fd)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        history.append(entry)
+        key = (st.st_mtime_ns, st.st_size)
+        _file_cache[community] = {"key": key, "data": history}
+        _tip[community] = {"hash": entry["hash"], "count": len(history)}
+        _response_cache[community] = {
+            "key": key,
+            "body": _dumps(history),
+            "etag": _etag_for(key),
+        }
+        # advance the frontier only if it covered the whole chain before
+        # this append AND the file state it certified is the one we just
+        # appended to; an out-of-band edit that happens to preserve count
+        # and tip hash must drop it, not get laundered into a new frontier
+        frontier = _verified.get(community)
+        if frontier:
+            if frontier == (len(history) - 1, entry.get("prev_hash"), pre_key):
+                _verified[community] = (len(history), entry["hash"], key)
+            else:
+                _verified.pop(community, None)
+
+# Group commit: request handlers queue their entry and block on an event
+# while a single writer thread drains up to _WRITER_BATCH_MAX entries (or
+# whatever arrives within _WRITER_WINDOW), appends them all, then fsyncs
+# each touched log once. A lone request pays at most the window in extra
+# latency; under load throughput scales with the batch instead of being
+# capped at one fsync per message.
+_WRITER_BATCH_MAX = 64
+_WRITER_WINDOW = 0.005  # seconds
+_WRITER_TIMEOUT = 10.0  # seconds; bounded so a dead writer means 500, not a hang
+_write_queue = queue.Queue()
+
+# Threads don't survive fork, and under `gunicorn --preload` this module
+# is imported in the master before workers fork — so the writer is
+# started lazily on first use and re-spawned in any process whose pid
+# doesn't match the one that started it. The queue is recreated along
+# with the thread: a forked copy still carries the dead writer's waiter
+# on its condition variable, so puts would notify a ghost and be lost.
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def _ensure_writer():
+    global _writer_pid, _write_queue
+    pid = os.getpid()
+    if _writer_pid == pid:
+        return
+    with _writer_lock:
+        if _writer_pid != pid:
+            if _writer_pid is not None:
+                _write_queue = queue.Queue()
+            threading.Thread(
+                target=_writer_loop, name="communities-writer", daemon=True
+            ).start()
+            _writer_pid = pid
+
+def _writer_loop():
+    while True:
+        batch = [_write_queue.get()]
+        deadline = time.monotonic() + _WRITER_WINDOW
+        while len(batch) < _WRITER_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        dirty = set()
+        for item in batch:
+            try:
+                append_entry(item["community"], item["entry"], sync=False)
+                dirty.add(item["community"])
+            except Exception as e:
+                item["error"] = e
+        with _data_lock:
+            for community in dirty:
+                fd = _fd_cache.get(community)
+                if fd is not None:
+                    try:
+                        os.fsync(fd)
+                    except OSError:
+                        pass
+        # only now are the writes durable; unblock the handlers
+        for item in batch:
+            item["done"].set()
+
+def submit_entry(community, entry):
+    """Queue an entry for the writer thread; returns once it is durable."""
+    _ensure_writer()
+    item = {"community": community, "entry": entry, "done": threading.Event(), "error": None}
+    _write_queue.put(item)
+    if not item["done"].wait(_WRITER_TIMEOUT):
+        raise RuntimeError("message write timed out")
+    if item["error"] is not None:
+        raise item["error"]
+
+def _write_community(community, history):
+    # atomic full rewrite; only used for bulk work such as migration.
+    # O_EXCL on the temp name avoids racing another writer for it.
+    path = _community_path(community, create=True)
+    tmp = path.with_suffix(".tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o644)
+    except FileExistsError:
+        tmp.unlink()
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(_dumps_compact(e) + b"\n" for e in history))
+    tmp.replace(path)
+    _drop_fd(community)  # any cached append fd now points at the old inode
+
+def _migrate_legacy_file():
+    # One-shot conversion of the old single communities.json dict into
+    # per-community JSONL logs; the legacy file is renamed afterwards so
+    # this never runs twice.
+    if not LEGACY_DATA_FILE.exists():
+        return
+    try:
+        data = _loads_cold(LEGACY_DATA_FILE.read_bytes())
+    except Exception:
+        return
+    if isinstance(data, list):
+        # old auto-fix: collapse list into dict by community
+        fixed = {}
+        for entry in data:
+            cid = entry.get("community", "unknown")
+            fixed.setdefault(cid, []).append(entry)
+        data = fixed
+    if isinstance(data, dict):
+        for community, history in data.items():
+            path = _community_path(community)
+            if isinstance(history, list) and history and (path is None or not path.exists()):
+                _write_community(community, history)
+    LEGACY_DATA_FILE.replace(LEGACY_DATA_FILE.with_suffix(".json.migrated"))
+
+_migrate_legacy_file()
+
+# ---------------- HELPERS ----------------
+_sha256 = hashlib.sha256
+
+def generate_hash(message, timestamp, community, prev_hash):
+    # community may be passed pre-encoded by hot loops; the joined bytes
+    # are identical to the old f"{m}|{t}|{c}|{p}".encode() so hashes of
+    # existing chains are unchanged
+    if not isinstance(community, bytes):
+        community = community.encode()
+    raw = b"|".join((message.encode(), timestamp.encode(), community, prev_hash.encode()))
+    return _sha256(raw).hexdigest()
+
+def _scan_chain(history, community, start, prev):
+    """Re-hash history[start:]; return the index of the first broken link, or None."""
+    community_bytes = community.encode()
+    for i in range(start, len(history)):
+        e = history[i]
+        expected = generate_hash(e["message"], e["timestamp"], community_bytes, prev)
+        if e.get("hash") != expected or e.get("prev_hash") != prev:
+            return i
+        prev = e["hash"]
+    return None
+
+def new_id():
+    # same 128 bits of CSPRNG entropy and the same dashed shape as
+    # uuid.uuid4(), without the UUID class's field validation/formatting
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+# Timestamps are second-resolution, so the formatted string only changes
+# once per second; re-format only when the epoch second ticks over.
+_ts_cache = [0, ""]
+
+def now_iso():
+    t = int(time.time())
+    if t != _ts_cache[0]:
+        _ts_cache[:] = [t, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t)) + "Z"]
+    return _ts_cache[1]
+
+# Most traffic hits a handful of active communities and repeat authors,
+# so memoize their normalization; interning the community name also makes
+# the dict lookups keyed on it cheap pointer compares.
+@lru_cache(maxsize=1024)
+def _normalize_community(community):
+    return sys.intern(community.strip())
+
+@lru_cache(maxsize=1024)
+def _normalize_author(author):
+    return (author or "anonymous").strip()
+
+def validate_message_payload(payload):
+    if not isinstance(payload, dict):
+        return "Invalid JSON", None
+    message = payload.get("message")
+    community = payload.get("community")
+    author = payload.get("author")  # optional
+    if not community or not isinstance(community, str):
+        return "community is required", None
+    if not message or not isinstance(message, str) or not message.strip():
+        return "message is required", None
+    # trim to reasonable length
+    msg = message.strip()
+    if len(msg) > 5000:
+        return "message too long", None
+    if author is not None and not isinstance(author, str):
+        author = None
+    return None, {
+        "community": _normalize_community(community),
+        "message": msg,
+        "author": _normalize_author(author),
+    }
+
+# ---------------- ROUTES ----------------
+@communities_api.route("/api/messages", methods=["GET"])
+def get_messages_grouped():
+    """
+    Returns all messages grouped by community:
+    {
+      "voya": [ {...}, ... ],
+      "1": [ {...}, ... ],
+      ...
+    }
+    """
+    data = load_data()
+    return _json_response(data)
+
+@communities_api.route("/api/messages/<community>", methods=["GET"])
+def get_messages_for_community(community):
+    """
+    Returns list of messages for a specific community.
+    """
+    with _data_lock:
+        history = _load_community_locked(community)
+        cached = _file_cache.get(community)
+        if cached is None:
+            return _json_response([])
+        key = cached["key"]
+        baked = _response_cache.get(community)
+        if baked is None or baked["key"] != key:
+            baked = {"key": key, "body": _dumps(history), "etag": _etag_for(key)}
+            _response_cache[community] = baked
+    if request.if_none_match.contains(baked["etag"].strip('"')):
+        return Response(status=304, headers={"ETag": baked["etag"]})
+    return Response(baked["body"], mimetype="application/json", headers={"ETag": baked["etag"]})
+
+@communities_api.route("/api/messages", methods=["POST"])
+def add_message():
+    """
+    Accepts JSON: { "community": "voya", "message": "Hello", "author": "Sreenidhi" }
+    Returns the created message with id/hash/timestamp.
+    """
+    payload = request.get_json(silent=True)
+    err, parsed = validate_message_payload(payload)
+    if err:
+        return _json_response({"error": err}, status=400)
+
+    community = parsed["community"]
+    message = parsed["message"]
+    author = parsed["author"]
+
+    prev_hash = get_tip(community)["hash"]
+    timestamp = now_iso()
+    entry_id = new_id()
+
+    entry = {
+        "id": entry_id,
+        "community": community,
+        "author": author,
+        "message": message,
+        "timestamp": timestamp,
+        "prev_hash": prev_hash,
+        "hash": generate_hash(message, timestamp, community, prev_hash),
+    }
+
+    try:
+        submit_entry(community, entry)
+    except Exception as e:
+        return _json_response({"error": str(e)}, status=500)
+
+    return _json_response(entry, status=201)
+
+@communities_api.route("/api/messages/<community>/verify", methods=["GET"])
+def verify_chain(community):
+    """
+    Verifies hash chain integrity for a community.
+    Returns { "ok": true } or details of the first broken link.
+    """
+    # snapshot the history together with the file key it belongs to in a
+    # single lock acquisition — append_entry grows the cached list in
+    # place, so key and list read separately can describe different
+    # states and the frontier written below would certify a state this
+    # scan never saw
+    with _data_lock:
+        history = list(_load_community_locked(community))
+        cached = _file_cache.get(community)
+        file_key = cached["key"] if cached else None
+
+        # resume from the verified frontier only if the file is
+        # unchanged since append_entry/verify last saw it
+        start, prev = 0, ""
+        frontier = _verified.get(community)
+        if frontier:
+            count, last_hash, key = frontier
+            if key == file_key and 0 < count <= len(history):
+                start, prev = count, last_hash
+            else:
+                _verified.pop(community, None)
+
+    # hashing happens outside the lock so GETs/POSTs aren't blocked
+    bad = _scan_chain(history, community, start, prev)
+    if bad is not None and start > 0:
+        # frontier may have hidden earlier tampering; redo the full scan
+        bad = _scan_chain(history, community, 0, "")
+
+    with _data_lock:
+        if bad is not None:
+            _verified.pop(community, None)
+        elif history:
+            # only certify the snapshot we actually scanned, and only if
+            # it is still the current file state
+            current = _file_cache.get(community)
+            if current and current["key"] == file_key:
+                _verified[community] = (len(history), history[-1]["hash"], file_key)
+    if bad is not None:
+        e = history[bad]
+        return _json_response({
+            "ok": False,
+            "index": bad,
+            "id": e.get("id"),
+            "reason": "hash mismatch or prev_hash mismatch"
+        })
+    return _json_response({"ok": True, "count": len(history)})